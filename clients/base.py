@@ -1,5 +1,105 @@
+import os
+import asyncio
+import importlib
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from types import MappingProxyType
+from typing import Callable, List, Dict, Any, Mapping, Optional, Sequence, Tuple, Union
+
+from utils.helpers import json_dumpb
+
+
+# Config file or dotted module -> (mtime, namespace, frozen ANTHROPIC_TOOLS); files are
+# re-executed only when they change, and the frozen tools are replaced along with the namespace
+_CONFIG_CACHE: Dict[str, Tuple[Optional[float], Dict[str, Any], Tuple[Mapping[str, Any], ...]]] = {}
+
+
+def _resolve_config_path(ref: str) -> str:
+    """Find a tool config file as given, relative to cwd, or relative to the repo root"""
+    path = os.path.abspath(ref)
+    if os.path.exists(path):
+        return path
+    
+    candidates = [
+        os.path.abspath(os.path.join(os.getcwd(), ref)),
+        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ref))
+    ]
+    for cand in candidates:
+        if os.path.exists(cand):
+            return cand
+    raise FileNotFoundError(f"Tool config file not found: {ref}")
+
+
+def _freeze_tools(namespace: Dict[str, Any]) -> Tuple[Mapping[str, Any], ...]:
+    """Read-only view of a config's ANTHROPIC_TOOLS"""
+    return tuple(MappingProxyType(tool) for tool in namespace.get("ANTHROPIC_TOOLS") or [])
+
+
+def _load_config(ref: str) -> Tuple[Dict[str, Any], Tuple[Mapping[str, Any], ...]]:
+    """
+    Globals of a tool config module (file path or dotted name) and its frozen tools,
+    executed once per file version
+    """
+    ref = ref.replace("\\", "/").strip()
+    
+    if not (ref.endswith(".py") or "/" in ref):
+        hit = _CONFIG_CACHE.get(ref)
+        if hit is None:
+            # importlib already caches dotted modules in sys.modules; they are never re-executed
+            namespace = vars(importlib.import_module(ref))
+            hit = _CONFIG_CACHE[ref] = (None, namespace, _freeze_tools(namespace))
+        return hit[1], hit[2]
+    
+    path = os.path.realpath(_resolve_config_path(ref))
+    mtime = os.stat(path).st_mtime
+    hit = _CONFIG_CACHE.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1], hit[2]
+    
+    # Config files are plain data: compile + exec them without the importlib machinery or sys.modules
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    namespace: Dict[str, Any] = {"__name__": "tool_config_module", "__file__": path}
+    exec(code, namespace)
+    frozen = _freeze_tools(namespace)
+    _CONFIG_CACHE[path] = (mtime, namespace, frozen)
+    return namespace, frozen
+
+
+def load_tool_config(ref: str) -> Tuple[Dict[str, Dict[str, str]], Tuple[Mapping[str, Any], ...]]:
+    """
+    Load tool settings from a config module, shared by every client that uses it
+    Returns: (TOOL_CONFIGS or {}, ANTHROPIC_TOOLS as a tuple of read-only mappings)
+    """
+    namespace, tools = _load_config(ref)
+    return namespace.get("TOOL_CONFIGS") or {}, tools
+
+
+def encode_request(request_id: int, method: str, params: Union[Dict[str, Any], bytes, None] = None) -> bytes:
+    """
+    JSON-RPC 2.0 request as bytes, filled into a fixed template instead of building a dict per call
+    Args:
+        params: Dict to encode, or JSON bytes that were encoded once up front
+    """
+    params_json = params if isinstance(params, bytes) else json_dumpb(params or {})
+    return b'{"jsonrpc":"2.0","id":%d,"method":%b,"params":%b}' % (request_id, json_dumpb(method), params_json)
+
+
+def clean_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop None/empty-string arguments the model sent for optional parameters"""
+    return {k: v for k, v in params.items() if v is not None and v != ""}
+
+
+def build_param_remappers(tool_configs: Dict[str, Dict[str, str]]) -> Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    Specialize param cleaning + renaming per tool once, when the config loads
+    Returns: tool name -> function(params) -> arguments for the server
+    """
+    def remapper(mapping: Dict[str, str]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        get = mapping.get
+        return lambda params: {get(k, k): v for k, v in params.items() if v is not None and v != ""}
+    
+    return {tool: remapper(mapping) for tool, mapping in tool_configs.items() if mapping}
+
 
 class BaseMCPClient(ABC):
     """Abstract base class for all types of MCP clients"""
@@ -7,7 +107,10 @@ class BaseMCPClient(ABC):
     def __init__(self, server_name: str = "unknown"):
         self.server_name = server_name
         self._tools: List[str] = []
-        self.anthropic_tools: List[Dict[str, Any]] = []
+        self._tools_view: Tuple[Optional[List[str]], Tuple[str, ...]] = (None, ())
+        self.anthropic_tools: Sequence[Mapping[str, Any]] = ()
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
     
     @abstractmethod
     async def initialize(self) -> List[str]:
@@ -17,6 +120,18 @@ class BaseMCPClient(ABC):
         """
         pass
     
+    async def ensure_initialized(self) -> List[str]:
+        """
+        Run initialize() exactly once, even if several callers race to it
+        Returns: List of tool names
+        """
+        if not self._initialized:
+            async with self._init_lock:
+                if not self._initialized:
+                    await self.initialize()
+                    self._initialized = True
+        return self._tools
+    
     @abstractmethod
     async def call_tool(self, tool_name: str, **params) -> str:
         """
@@ -28,22 +143,24 @@ class BaseMCPClient(ABC):
         """
         pass
     
-    @abstractmethod
-    async def list_tools(self) -> List[str]:
+    async def list_tools(self) -> Tuple[str, ...]:
         """
         Get list of available tools
-        Returns: List of tool names
+        Returns: Tool names as a read-only tuple, rebuilt only when self._tools is replaced
         """
-        pass
+        tools = self._tools
+        if self._tools_view[0] is not tools:
+            self._tools_view = (tools, tuple(tools))
+        return self._tools_view[1]
     
     async def close(self):
         """Close connections and clean up resources"""
         pass
     
-    def get_anthropic_tools(self) -> List[Dict[str, Any]]:
+    def get_anthropic_tools(self) -> Sequence[Mapping[str, Any]]:
         """
         Get tool definitions for Anthropic API
-        Returns: List of tool definitions
+        Returns: Read-only tool definitions, shared with every client of the same config
         """
         return self.anthropic_tools
     
@@ -1,13 +1,26 @@
-import os
-import sys
-import json
-import importlib
-import importlib.util
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import Callable, List, Dict, Any, Optional
 
 from fastmcp import Client
-from .base import BaseMCPClient
+from .base import BaseMCPClient, build_param_remappers, clean_params, load_tool_config
 from utils.logger import mcp_logger
+from utils.helpers import json_dumps
+
+
+def _block_text(block: Any) -> str:
+    """Text of one content block; non-text blocks are serialized as JSON"""
+    text = getattr(block, "text", None)
+    if text:
+        return text
+    if isinstance(block, dict) and "text" in block:
+        return block["text"]
+    if isinstance(block, str):
+        return block
+    try:
+        return json_dumps(block)
+    except Exception:
+        return str(block)
+
 
 class FastMCPClient(BaseMCPClient):
     """Client for FastMCP - loads configuration from external file"""
@@ -17,6 +30,40 @@ class FastMCPClient(BaseMCPClient):
         self.server_path = server_path
         self.config_module = config_module
         self.tool_configs: Dict[str, Dict[str, str]] = {}
+        self._remap: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self._cm: Optional[Client] = None
+        self._client: Optional[Client] = None
+        self._connect_lock = asyncio.Lock()
+    
+    async def _ensure(self) -> Client:
+        """Open the long-lived FastMCP session on first use and reuse it afterwards"""
+        if self._client is None:
+            async with self._connect_lock:
+                if self._client is None:
+                    cm = Client(self.server_path)
+                    self._client = await cm.__aenter__()
+                    self._cm = cm
+        return self._client
+    
+    async def _discard(self, stale: Client):
+        """Drop a session that lost its transport so the next _ensure() reconnects"""
+        async with self._connect_lock:
+            if self._client is not stale:
+                # Another call already replaced it
+                return
+            cm, self._cm, self._client = self._cm, None, None
+        try:
+            await cm.__aexit__(None, None, None)
+        except Exception:
+            pass
+    
+    @staticmethod
+    async def _call_on(client: Client, tool_name: str, args_dict: Dict[str, Any]):
+        try:
+            return await client.call_tool(tool_name, arguments=args_dict)
+        except TypeError:
+            # Fallback for older signatures
+            return await client.call_tool(tool_name, args_dict)
     
     async def initialize(self) -> List[str]:
         """Initialize and load tool settings"""
@@ -24,17 +71,16 @@ class FastMCPClient(BaseMCPClient):
             if self.config_module:
                 self._load_tool_config()
             
-            client = Client(self.server_path)
-            async with client:
-                await client.ping()
-                tools = await client.list_tools()
-                
-                if hasattr(tools, 'tools'):
-                    self._tools = [tool.name for tool in tools.tools]
-                elif isinstance(tools, list):
-                    self._tools = [tool.name if hasattr(tool, 'name') else str(tool) for tool in tools]
-                else:
-                    self._tools = []
+            client = await self._ensure()
+            await client.ping()
+            tools = await client.list_tools()
+            
+            if hasattr(tools, 'tools'):
+                self._tools = [tool.name for tool in tools.tools]
+            elif isinstance(tools, list):
+                self._tools = [tool.name if hasattr(tool, 'name') else str(tool) for tool in tools]
+            else:
+                self._tools = []
             
             # Log successful connection
             mcp_logger.log_server_connection(
@@ -54,6 +100,11 @@ class FastMCPClient(BaseMCPClient):
                 "failed", 
                 error=e
             )
+            # Don't leave the session (and its server subprocess) open behind a failed init
+            try:
+                await self.close()
+            except Exception:
+                pass
             raise
     
     async def call_tool(self, tool_name: str, **params) -> str:
@@ -64,21 +115,19 @@ class FastMCPClient(BaseMCPClient):
         """
         try:
             # Clean & map params
-            clean_params = {k: v for k, v in params.items() if v is not None and v != ""}
-            if self.tool_configs and tool_name in self.tool_configs:
-                mapping = self.tool_configs[tool_name] or {}
-                args_dict = {mapping.get(k, k): v for k, v in clean_params.items()}
-            else:
-                args_dict = clean_params
+            args_dict = self._remap.get(tool_name, clean_params)(params)
 
-            # Call the tool
-            client = Client(self.server_path)
-            async with client:
-                try:
-                    result = await client.call_tool(tool_name, arguments=args_dict)
-                except TypeError:
-                    # Fallback for older signatures
-                    result = await client.call_tool(tool_name, args_dict)
+            # Call the tool on the persistent session
+            client = await self._ensure()
+            try:
+                result = await self._call_on(client, tool_name, args_dict)
+            except Exception:
+                # Only a dropped session is worth one reconnect; tool errors propagate as-is
+                if client.is_connected():
+                    raise
+                await self._discard(client)
+                client = await self._ensure()
+                result = await self._call_on(client, tool_name, args_dict)
 
             # Normalize result
             result_str = self._normalize_result(result)
@@ -114,25 +163,12 @@ class FastMCPClient(BaseMCPClient):
         # ToolResponse-style: prefer textual blocks
         content = getattr(result, "content", None)
         if content:
-            parts = []
-            for block in content:
-                text = getattr(block, "text", None)
-                if text:
-                    parts.append(text)
-                elif isinstance(block, dict) and "text" in block:
-                    parts.append(block["text"])
-                else:
-                    try:
-                        parts.append(json.dumps(block, ensure_ascii=False))
-                    except Exception:
-                        parts.append(str(block))
-            if parts:
-                return "\n".join(parts)
+            return "\n".join(map(_block_text, content))
 
         # Some clients expose .data
         if hasattr(result, "data"):
             try:
-                return json.dumps(result.data, ensure_ascii=False)
+                return json_dumps(result.data)
             except Exception:
                 return str(result.data)
 
@@ -142,12 +178,15 @@ class FastMCPClient(BaseMCPClient):
         if isinstance(result, str):
             return result
         try:
-            return json.dumps(result, ensure_ascii=False)
+            return json_dumps(result)
         except Exception:
             return str(result)
     
-    async def list_tools(self) -> List[str]:
-        return self._tools
+    async def close(self):
+        """Close the persistent FastMCP session"""
+        cm, self._cm, self._client = self._cm, None, None
+        if cm is not None:
+            await cm.__aexit__(None, None, None)
     
     def _load_tool_config(self):
         """
@@ -155,39 +194,13 @@ class FastMCPClient(BaseMCPClient):
         
         Fills:
             self.tool_configs  <- module.TOOL_CONFIGS (dict) or {}
-            self.anthropic_tools <- module.ANTHROPIC_TOOLS (list) or []
+            self.anthropic_tools <- module.ANTHROPIC_TOOLS (frozen tuple) or ()
         """
         if not self.config_module:
             return
 
         try:
-            ref = self.config_module.replace("\\", "/").strip()
-
-            if ref.endswith(".py") or "/" in ref:
-                path = os.path.abspath(ref)
-                if not os.path.exists(path):
-                    candidates = [
-                        os.path.abspath(os.path.join(os.getcwd(), ref)),
-                        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ref))
-                    ]
-                    for cand in candidates:
-                        if os.path.exists(cand):
-                            path = cand
-                            break
-                    else:
-                        raise FileNotFoundError(f"Tool config file not found: {self.config_module}")
-
-                spec = importlib.util.spec_from_file_location("tool_config_module", path)
-                if not spec or not spec.loader:
-                    raise ImportError(f"Could not load spec for {path}")
-                mod = importlib.util.module_from_spec(spec)
-                sys.modules[spec.name] = mod
-                spec.loader.exec_module(mod)
-            else:
-                mod = importlib.import_module(ref)
-
-            self.tool_configs = getattr(mod, "TOOL_CONFIGS", {}) or {}
-            self.anthropic_tools = getattr(mod, "ANTHROPIC_TOOLS", []) or []
-            
+            self.tool_configs, self.anthropic_tools = load_tool_config(self.config_module)
+            self._remap = build_param_remappers(self.tool_configs)
         except Exception as e:
             print(f"Warning: Could not load tool config from {self.config_module}: {e}")
\ No newline at end of file
@@ -1,19 +1,28 @@
-import requests
-import importlib.util
-from typing import List, Dict, Any, Optional
+import itertools
+import httpx
+from typing import List, Dict, Any, Optional, Tuple
 
-from .base import BaseMCPClient
+from .base import BaseMCPClient, encode_request, load_tool_config
 from utils.logger import mcp_logger
+from utils.helpers import json_dumps, json_loads
 
 class HTTPMCPClient(BaseMCPClient):
     """Client for MCPs over HTTP"""
     
+    _JSON_HEADERS = {"content-type": "application/json"}
+    
     def __init__(self, url: str, tools: Optional[List[str]] = None, config_module: Optional[str] = None, server_name: str = "http"):
         super().__init__(server_name)
         self.url = url
-        self._id = 0
+        self._ids = itertools.count(1)
         self._tools = tools or []
         self.config_module = config_module
+        # HTTP/2 multiplexes concurrent tool calls over one pooled connection
+        self._http = httpx.AsyncClient(
+            timeout=10,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=16)
+        )
         
         if self.config_module:
             self._load_tool_config()
@@ -21,12 +30,7 @@ class HTTPMCPClient(BaseMCPClient):
     def _load_tool_config(self):
         """Load specific tool settings"""
         try:
-            spec = importlib.util.spec_from_file_location("tool_config", self.config_module)
-            config_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(config_module)
-            
-            if hasattr(config_module, 'ANTHROPIC_TOOLS'):
-                self.anthropic_tools = config_module.ANTHROPIC_TOOLS
+            _, self.anthropic_tools = load_tool_config(self.config_module)
         except Exception as e:
             print(f"Warning: Could not load tool config: {e}")
     
@@ -60,22 +64,52 @@ class HTTPMCPClient(BaseMCPClient):
     
     async def call(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """HTTP JSON-RPC call"""
-        self._id += 1
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._id,
-            "method": method,
-            "params": params or {}
-        }
+        request = encode_request(next(self._ids), method, params)
         
-        response = requests.post(self.url, json=request, timeout=10)
+        response = await self._http.post(self.url, content=request, headers=self._JSON_HEADERS)
         response.raise_for_status()
-        result = response.json()
+        result = json_loads(response.content)
         
         if "error" in result:
             raise RuntimeError(result["error"])
         return result.get("result")
     
+    async def call_batch(self, calls: List[Tuple[str, Optional[Dict[str, Any]]]]) -> List[Any]:
+        """
+        Send several JSON-RPC calls in one HTTP request (JSON-RPC 2.0 batch)
+        Only for servers that still accept batches: MCP 2025-06-18 dropped them, and the bundled
+        color server answers them with 400, so tool calls go through call() instead
+        Args:
+            calls: (method, params) pairs
+        Returns: Results in the same order as calls; a failed call yields a RuntimeError instance
+        """
+        if not calls:
+            return []
+        
+        ids = {next(self._ids): index for index in range(len(calls))}
+        batch = b"[" + b",".join(
+            encode_request(request_id, method, params)
+            for request_id, (method, params) in zip(ids, calls)
+        ) + b"]"
+        
+        response = await self._http.post(self.url, content=batch, headers=self._JSON_HEADERS)
+        response.raise_for_status()
+        replies = json_loads(response.content)
+        if isinstance(replies, dict):
+            # Servers without batch support answer with a single error object
+            raise RuntimeError(replies.get("error", replies))
+        
+        # Responses may arrive in any order; match them back by id
+        results: List[Any] = [RuntimeError("No response for batched call") for _ in calls]
+        for reply in replies:
+            index = ids.get(reply.get("id"))
+            if index is not None:
+                if "error" in reply:
+                    results[index] = RuntimeError(reply["error"])
+                else:
+                    results[index] = reply.get("result")
+        return results
+    
     async def call_tool(self, tool_name: str, **params) -> str:
         """Call tool via HTTP"""
         try:
@@ -108,12 +142,18 @@ class HTTPMCPClient(BaseMCPClient):
     
     def _process_result(self, result) -> str:
         """Process HTTP tool result"""
+        if isinstance(result, str):
+            return result
+        
+        # Fall back to JSON (not a Python repr) so downstream consumers can parse it
         if isinstance(result, dict) and "content" in result:
             content = result.get("content", [])
             if content and len(content) > 0:
-                return content[0].get("text", str(result))
+                text = content[0].get("text")
+                return text if text is not None else json_dumps(result)
         
-        return str(result)
+        return json_dumps(result)
     
-    async def list_tools(self) -> List[str]:
-        return self._tools
\ No newline at end of file
+    async def close(self):
+        """Close the pooled HTTP client"""
+        await self._http.aclose()
\ No newline at end of file
@@ -3,19 +3,53 @@ Cliente para servidores MCP oficiales que usan stdio
 """
 
 import asyncio
-import json
-import os
+import itertools
 import sys
-import importlib.util
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterator, List, Dict, Any, Optional, Set, Tuple, Union
 
-from .base import BaseMCPClient
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as _timeout
+else:
+    from async_timeout import timeout as _timeout
+
+from .base import BaseMCPClient, build_param_remappers, clean_params, encode_request, load_tool_config
 from utils.logger import mcp_logger
+from utils.helpers import json_dumpb, json_dumps, json_loads
+
+
+# Max bytes of one stdout/stderr line (one JSON-RPC message)
+_STREAM_LIMIT = 16 * 1024 * 1024
+
+
+def _block_texts(content: List[Any]) -> Iterator[str]:
+    """Text of each result content block; blocks without text/data are serialized as JSON"""
+    for block in content:
+        if isinstance(block, dict):
+            if "text" in block:
+                yield block["text"]
+            elif "data" in block:
+                yield str(block["data"])
+            else:
+                yield json_dumps(block)
+        else:
+            yield str(block)
 
 
 class StdioMCPClient(BaseMCPClient):
     """Client for official MCP servers using stdio"""
     
+    # Identical for every server, so it is encoded once per process
+    _INITIALIZE_PARAMS = json_dumpb({
+        "protocolVersion": "2024-11-05",
+        "capabilities": {
+            "tools": {}
+        },
+        "clientInfo": {
+            "name": "modular-chatbot",
+            "version": "1.0.0"
+        }
+    })
+    
     def __init__(self, cmd: List[str], cwd: str = ".", config_module: Optional[str] = None, server_name: str = "stdio"):
         super().__init__(server_name)
         self.cmd = cmd
@@ -23,7 +57,13 @@ class StdioMCPClient(BaseMCPClient):
         self.config_module = config_module
         self.process: Optional[asyncio.subprocess.Process] = None
         self.tool_configs: Dict[str, Dict[str, str]] = {}
-        self._next_id = 1
+        self._remap: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._outbox: List[Tuple[bytes, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
     
     async def initialize(self) -> List[str]:
         """Initialize process and obtain tools"""
@@ -36,20 +76,15 @@ class StdioMCPClient(BaseMCPClient):
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=self.cwd
+                cwd=self.cwd,
+                # Whole JSON-RPC responses arrive as one line; 64 KB default is too small for large results
+                limit=_STREAM_LIMIT
             )
+            self._reader_task = asyncio.create_task(self._read_responses())
+            self._stderr_task = asyncio.create_task(self._drain_stderr())
             
             # Initialize connection
-            await self._send_request("initialize", {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "clientInfo": {
-                    "name": "modular-chatbot",
-                    "version": "1.0.0"
-                }
-            })
+            await self._send_request("initialize", self._INITIALIZE_PARAMS)
             
             # Get list of tools
             tools_response = await self._send_request("tools/list", {})
@@ -76,52 +111,106 @@ class StdioMCPClient(BaseMCPClient):
             )
             raise
     
-    async def _send_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Send JSON-RPC request to the server"""
+    def is_alive(self) -> bool:
+        """Process still running and its stdout reader still attached"""
+        return (
+            self.process is not None
+            and self.process.returncode is None
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
+    
+    async def _send_request(self, method: str, params: Union[Dict[str, Any], bytes, None] = None) -> Dict[str, Any]:
+        """Send JSON-RPC request to the server; params may be pre-encoded JSON bytes"""
         if not self.process:
             raise RuntimeError("Process not initialized")
+        if self._reader_task is None or self._reader_task.done():
+            raise RuntimeError("Server process is not running")
         
-        request = {
-            "jsonrpc": "2.0",
-            "id": self._next_id,
-            "method": method,
-            "params": params or {}
-        }
-        self._next_id += 1
+        request_id = next(self._ids)
+        frame = encode_request(request_id, method, params) + b"\n"
         
-        # Send request
-        request_line = json.dumps(request) + "\n"
-        self.process.stdin.write(request_line.encode())
-        await self.process.stdin.drain()
+        # Register before sending so the reader can never see the reply first
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
         
-        # Read response
         try:
-            response_line = await asyncio.wait_for(
-                self.process.stdout.readline(), 
-                timeout=10.0
-            )
-            if not response_line:
-                raise RuntimeError("No response from server")
-            
-            response = json.loads(response_line.decode().strip())
-            
-            if "error" in response:
-                raise RuntimeError(f"Server error: {response['error']}")
-            
-            return response.get("result")
-            
+            # Scoped deadline instead of wait_for: no extra Task per request
+            async with _timeout(10.0):
+                # Queue the frame; requests made in the same loop tick share one write + drain
+                self._outbox.append((frame, future))
+                if self._flush_task is None or self._flush_task.done():
+                    self._flush_task = asyncio.create_task(self._flush())
+                
+                # Wait for the reader task to route the matching response here
+                response = await future
         except asyncio.TimeoutError:
             raise RuntimeError("Timeout waiting for server response")
+        finally:
+            self._pending.pop(request_id, None)
+        
+        if "error" in response:
+            raise RuntimeError(f"Server error: {response['error']}")
+        
+        return response.get("result")
+    
+    async def _flush(self):
+        """Write every queued frame with a single writelines() and drain()"""
+        await asyncio.sleep(0)
+        # Frames queued while draining go out on the next pass, not with a new task
+        while self._outbox:
+            batch, self._outbox = self._outbox, []
+            try:
+                self.process.stdin.writelines([frame for frame, _ in batch])
+                await self.process.stdin.drain()
+            except Exception as e:
+                # Callers would otherwise wait for replies to frames that never went out
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+    
+    async def _read_responses(self):
+        """Read stdout and resolve the pending request whose id matches each response"""
+        try:
+            while True:
+                response_line = await self.process.stdout.readline()
+                if not response_line:
+                    break
+                
+                try:
+                    response = json_loads(response_line)
+                except ValueError:
+                    continue
+                
+                # Notifications and unknown ids have nobody waiting on them
+                if not isinstance(response, dict):
+                    continue
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            # Server exited or the reader died: fail waiters now instead of at their timeout
+            pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError("No response from server"))
+    
+    async def _drain_stderr(self):
+        """Keep reading stderr so a chatty server never blocks on a full pipe"""
+        while True:
+            try:
+                line = await self.process.stderr.readline()
+            except ValueError:
+                # Line longer than the stream limit: its buffered part was dropped, keep draining
+                continue
+            if not line:
+                break
+            mcp_logger.log_server_stderr(self.server_name, line.decode("utf-8", errors="replace").rstrip())
     
     async def call_tool(self, tool_name: str, **params) -> str:
         """Call MCP server tool"""
         try:
-            clean_params = {k: v for k, v in params.items() if v is not None and v != ""}
-            if self.tool_configs and tool_name in self.tool_configs:
-                mapping = self.tool_configs[tool_name] or {}
-                args_dict = {mapping.get(k, k): v for k, v in clean_params.items()}
-            else:
-                args_dict = clean_params
+            args_dict = self._remap.get(tool_name, clean_params)(params)
             
             result = await self._send_request("tools/call", {
                 "name": tool_name,
@@ -162,71 +251,110 @@ class StdioMCPClient(BaseMCPClient):
         if isinstance(result, dict) and "content" in result:
             content = result["content"]
             if isinstance(content, list) and content:
-                parts = []
-                for block in content:
-                    if isinstance(block, dict):
-                        if "text" in block:
-                            parts.append(block["text"])
-                        elif "data" in block:
-                            parts.append(str(block["data"]))
-                        else:
-                            parts.append(json.dumps(block, ensure_ascii=False))
-                    else:
-                        parts.append(str(block))
-                return "\n".join(parts) if parts else ""
+                return "\n".join(_block_texts(content))
         
         return str(result)
     
-    async def list_tools(self) -> List[str]:
-        return self._tools
-    
     def _load_tool_config(self):
         """Load tool settings from Python module"""
         if not self.config_module:
             return
         
         try:
-            ref = self.config_module.replace("\\", "/").strip()
-            
-            if ref.endswith(".py") or "/" in ref:
-                path = os.path.abspath(ref)
-                if not os.path.exists(path):
-                    candidates = [
-                        os.path.abspath(os.path.join(os.getcwd(), ref)),
-                        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ref))
-                    ]
-                    for cand in candidates:
-                        if os.path.exists(cand):
-                            path = cand
-                            break
-                    else:
-                        print(f"Warning: Tool config file not found: {self.config_module}")
-                        return
-                
-                spec = importlib.util.spec_from_file_location("tool_config_module", path)
-                if not spec or not spec.loader:
-                    print(f"Warning: Could not load spec for {path}")
-                    return
-                
-                mod = importlib.util.module_from_spec(spec)
-                sys.modules[spec.name] = mod
-                spec.loader.exec_module(mod)
-            else:
-                mod = importlib.import_module(ref)
-            
-            self.tool_configs = getattr(mod, "TOOL_CONFIGS", {}) or {}
-            self.anthropic_tools = getattr(mod, "ANTHROPIC_TOOLS", []) or []
-            
+            self.tool_configs, self.anthropic_tools = load_tool_config(self.config_module)
+            self._remap = build_param_remappers(self.tool_configs)
         except Exception as e:
             print(f"Warning: Could not load tool config from {self.config_module}: {e}")
     
     async def close(self):
         """Cerrar el proceso del servidor"""
-        if self.process:
+        # Stop the background tasks first so no pending read outlives the process
+        tasks = [task for task in (self._reader_task, self._flush_task, self._stderr_task) if task and not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self.process and self.process.returncode is None:
             try:
                 self.process.terminate()
-                await asyncio.wait_for(self.process.wait(), timeout=5.0)
-            except:
-                if self.process.returncode is None:
-                    self.process.kill()
-                    await self.process.wait()
\ No newline at end of file
+                async with _timeout(5.0):
+                    await self.process.wait()
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+            except ProcessLookupError:
+                # Exited on its own between the returncode check and terminate()
+                pass
+
+class StdioMCPClientPool(BaseMCPClient):
+    """Several warm processes of the same stdio server; each call borrows an idle one"""
+    
+    def __init__(self, cmd: List[str], cwd: str = ".", config_module: Optional[str] = None,
+                 server_name: str = "stdio", size: int = 2):
+        super().__init__(server_name)
+        self.clients = [StdioMCPClient(cmd, cwd, config_module, server_name) for _ in range(max(1, size))]
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._respawns: Set[asyncio.Task] = set()
+    
+    async def initialize(self) -> List[str]:
+        """Start every process concurrently; they all expose the same tools"""
+        try:
+            await asyncio.gather(*(client.initialize() for client in self.clients))
+        except Exception:
+            await self.close()
+            raise
+        
+        for client in self.clients:
+            self._idle.put_nowait(client)
+        
+        first = self.clients[0]
+        self._tools = first._tools
+        self.anthropic_tools = first.anthropic_tools
+        return self._tools
+    
+    async def call_tool(self, tool_name: str, **params) -> str:
+        client = await self._idle.get()
+        try:
+            # It may have died while idle
+            if not client.is_alive():
+                client = await self._replace(client)
+            return await client.call_tool(tool_name, **params)
+        finally:
+            if client.is_alive():
+                self._idle.put_nowait(client)
+            else:
+                # Don't hand a dead process to the next caller: restart it in the background
+                task = asyncio.create_task(self._respawn(client))
+                self._respawns.add(task)
+                task.add_done_callback(self._respawns.discard)
+    
+    async def _replace(self, dead: StdioMCPClient) -> StdioMCPClient:
+        """Close a dead client and start a fresh process in its slot"""
+        await dead.close()
+        fresh = StdioMCPClient(dead.cmd, dead.cwd, dead.config_module, self.server_name)
+        try:
+            await fresh.initialize()
+        except BaseException:
+            # Also on cancellation (pool closing), so the new process never leaks
+            await fresh.close()
+            raise
+        self.clients[self.clients.index(dead)] = fresh
+        return fresh
+    
+    async def _respawn(self, dead: StdioMCPClient):
+        """Replace a dead client and return its slot to the pool"""
+        try:
+            client = await self._replace(dead)
+        except Exception:
+            # Keep the slot; the next call that draws it retries the restart
+            client = dead
+        self._idle.put_nowait(client)
+    
+    async def close(self):
+        """Close every process in the pool"""
+        for task in self._respawns:
+            task.cancel()
+        if self._respawns:
+            await asyncio.gather(*self._respawns, return_exceptions=True)
+        await asyncio.gather(*(client.close() for client in self.clients), return_exceptions=True)
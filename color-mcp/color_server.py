@@ -1,12 +1,51 @@
+import colorsys
+import functools
+import gzip
 import json
 import os
+import random
+import re
+import time
+from collections import deque
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from itertools import islice
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 from fastmcp import FastMCP
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 mcp = FastMCP("ColorTools")
 
+# Two-digit uppercase hex for every channel value, indexed by the value itself
+_HEX2 = [f"{i:02X}" for i in range(256)]
+
+def _parse_hex(hex_color: str) -> tuple:
+    """Parse a 6-digit HEX string (no '#') into an (r, g, b) tuple; ValueError if invalid"""
+    rgb = bytes.fromhex(hex_color)
+    if len(rgb) != 3:
+        raise ValueError(hex_color)
+    return rgb[0], rgb[1], rgb[2]
+
+def _to_hex(r: int, g: int, b: int) -> str:
+    return _HEX2[r] + _HEX2[g] + _HEX2[b]
+
+# Colors repeat heavily within a session, so the pure conversions are memoized;
+# the wrappers below still log every call
+@functools.lru_cache(maxsize=256)
+def _hex_to_rgb_pure(hex_color: str) -> str:
+    """Result text for 6 uppercase HEX digits (no '#'); ValueError if invalid"""
+    r, g, b = _parse_hex(hex_color)
+    return f"HEX #{hex_color} = RGB({r}, {g}, {b})"
+
+@functools.lru_cache(maxsize=256)
+def _rgb_to_hex_pure(r: int, g: int, b: int) -> str:
+    """Result text for in-range RGB channels"""
+    return f"RGB({r}, {g}, {b}) = HEX #{_to_hex(r, g, b)}"
+
 def convert_hex_to_rgb(hex_color: str) -> str:
     """Convert HEX color to RGB values - Utility function"""
     log_mcp_call("hex_to_rgb", {"hex_color": hex_color})
@@ -15,8 +54,7 @@ def convert_hex_to_rgb(hex_color: str) -> str:
         if len(hex_color) != 6:
             return "Error: HEX color must be 6 characters long (e.g., #FF0000 or FF0000)"
         
-        rgb = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        result = f"HEX #{hex_color.upper()} = RGB({rgb[0]}, {rgb[1]}, {rgb[2]})"
+        result = _hex_to_rgb_pure(hex_color.upper())
         log_mcp_response("hex_to_rgb", result)
         return result
     except ValueError:
@@ -28,13 +66,13 @@ def convert_rgb_to_hex(r: int, g: int, b: int) -> str:
     """Convert RGB values to HEX color - Utility function"""
     log_mcp_call("rgb_to_hex", {"r": r, "g": g, "b": b})
     try:
-        if not all(0 <= val <= 255 for val in [r, g, b]):
+        # Any bit above the low 8 (including a negative sign) means out of range
+        if (r | g | b) & ~0xFF:
             error = "Error: RGB values must be between 0 and 255"
             log_mcp_response("rgb_to_hex", error)
             return error
         
-        hex_color = f"#{r:02X}{g:02X}{b:02X}"
-        result = f"RGB({r}, {g}, {b}) = HEX {hex_color}"
+        result = _rgb_to_hex_pure(r, g, b)
         log_mcp_response("rgb_to_hex", result)
         return result
     except Exception as e:
@@ -45,54 +83,60 @@ def convert_rgb_to_hex(r: int, g: int, b: int) -> str:
 def generate_random_color() -> str:
     """Generate a random color - Utility function"""
     log_mcp_call("random_color", {})
-    import random
-    r = random.randint(0, 255)
-    g = random.randint(0, 255)
-    b = random.randint(0, 255)
+    # Three random bytes are the color; their hex is the HEX code
+    rgb = random.randbytes(3)
+    r, g, b = rgb
     
-    hex_color = f"#{r:02X}{g:02X}{b:02X}"
+    hex_color = "#" + rgb.hex().upper()
     result = f"Random Color: HEX {hex_color} | RGB({r}, {g}, {b})"
     log_mcp_response("random_color", result)
     return result
 
+# Hue offsets (fractions of a turn) of the colors each palette adds to the base
+_PALETTE_OFFSETS = {
+    "complementary": (0.5,),
+    "triadic": (1/3, 2/3),
+    "analogous": (-30/360, 30/360),
+}
+
+def _hsv_rotate(h: float, s: float, v: float, offsets: tuple) -> list:
+    """RGB (0-255 ints) of the color rotated by each hue offset; same math as colorsys.hsv_to_rgb"""
+    p = v * (1.0 - s)
+    colors = []
+    for offset in offsets:
+        hue = ((h + offset) % 1.0) * 6.0
+        i = int(hue)
+        f = hue - i
+        q = v * (1.0 - s * f)
+        t = v * (1.0 - s * (1.0 - f))
+        rgb = ((v, t, p), (q, v, p), (p, v, t), (p, q, v), (t, p, v), (v, p, q))[i % 6]
+        colors.append((int(rgb[0] * 255), int(rgb[1] * 255), int(rgb[2] * 255)))
+    return colors
+
+@functools.lru_cache(maxsize=1024)
+def _compute_palette(base_color: str, palette_type: str) -> str:
+    """Palette text for a normalized base color (6 uppercase HEX digits, no '#'); pure, so cached"""
+    r, g, b = [x/255.0 for x in _parse_hex(base_color)]
+    h, s, v = colorsys.rgb_to_hsv(r, g, b)
+    
+    # Header, base and every rotated color go through a single join
+    suffix = f" ({palette_type})"
+    lines = [f"{palette_type.capitalize()} Palette:", f"#{base_color} (base)"]
+    lines += ["#" + _to_hex(*rgb) + suffix for rgb in _hsv_rotate(h, s, v, _PALETTE_OFFSETS.get(palette_type, ()))]
+    return "\n".join(lines)
+
 def generate_color_palette(base_color: str, palette_type: str = "complementary") -> str:
     """Generate color palette - Utility function"""
     log_mcp_call("color_palette", {"base_color": base_color, "palette_type": palette_type})
     try:
-        import colorsys
         base_color = base_color.lstrip('#')
         if len(base_color) != 6:
             error = "Error: Base color must be in HEX format (e.g., #FF0000)"
             log_mcp_response("color_palette", error)
             return error
         
-        rgb = tuple(int(base_color[i:i+2], 16) for i in (0, 2, 4))
-        r, g, b = [x/255.0 for x in rgb]
-        h, s, v = colorsys.rgb_to_hsv(r, g, b)
-        
-        colors = [f"#{base_color.upper()} (base)"]
-        
-        if palette_type == "complementary":
-            comp_h = (h + 0.5) % 1.0
-            comp_rgb = colorsys.hsv_to_rgb(comp_h, s, v)
-            comp_rgb = tuple(int(x * 255) for x in comp_rgb)
-            colors.append(f"#{comp_rgb[0]:02X}{comp_rgb[1]:02X}{comp_rgb[2]:02X} (complementary)")
-            
-        elif palette_type == "triadic":
-            for offset in [1/3, 2/3]:
-                tri_h = (h + offset) % 1.0
-                tri_rgb = colorsys.hsv_to_rgb(tri_h, s, v)
-                tri_rgb = tuple(int(x * 255) for x in tri_rgb)
-                colors.append(f"#{tri_rgb[0]:02X}{tri_rgb[1]:02X}{tri_rgb[2]:02X} (triadic)")
-                
-        elif palette_type == "analogous":
-            for offset in [-30/360, 30/360]:
-                ana_h = (h + offset) % 1.0
-                ana_rgb = colorsys.hsv_to_rgb(ana_h, s, v)
-                ana_rgb = tuple(int(x * 255) for x in ana_rgb)
-                colors.append(f"#{ana_h[0]:02X}{ana_rgb[1]:02X}{ana_rgb[2]:02X} (analogous)")
-        
-        result = f"{palette_type.capitalize()} Palette:\n" + "\n".join(colors)
+        # "#ff0000" and "FF0000" share one cache entry
+        result = _compute_palette(base_color.upper(), palette_type)
         log_mcp_response("color_palette", result)
         return result
     except Exception as e:
@@ -120,33 +164,162 @@ def color_palette(base_color: str, palette_type: str = "complementary") -> str:
     """Generate color palette based on a base color"""
     return generate_color_palette(base_color, palette_type)
 
-mcp_log = []
+# Most recent MCP requests/responses; old entries fall off instead of growing forever.
+# deque.append is atomic, so handler threads can log without a lock
+mcp_log = deque(maxlen=1000)
+
+# Per-call console output is opt-in (MCP_DEBUG=1); read once at import
+_DEBUG = bool(os.environ.get('MCP_DEBUG'))
+
+def _with_timestamp(entry):
+    """Copy of a log entry with its raw time.time() stamp formatted as ISO-8601"""
+    entry = dict(entry)
+    return {"timestamp": datetime.fromtimestamp(entry.pop("ts")).isoformat(), **entry}
 
 def log_mcp_call(method, params):
-    timestamp = datetime.now().isoformat()
     log_entry = {
-        "timestamp": timestamp,
+        "ts": time.time(),
         "type": "request",
         "method": method,
         "params": params,
         "protocol": "MCP-JSON-RPC"
     }
     mcp_log.append(log_entry)
-    print(f"MCP CALL: {method} - {params}")
+    if _DEBUG:
+        print(f"MCP CALL: {method} - {params}")
 
 def log_mcp_response(method, result):
-    timestamp = datetime.now().isoformat()
     log_entry = {
-        "timestamp": timestamp,
+        "ts": time.time(),
         "type": "response", 
         "method": method,
         "result": result,
         "protocol": "MCP-JSON-RPC"
     }
     mcp_log.append(log_entry)
-    print(f"MCP RESPONSE: {method} - {result[:50]}...")
+    if _DEBUG:
+        print(f"MCP RESPONSE: {method} - {result[:50]}...")
+
+def _dumps(obj) -> bytes:
+    """Compact JSON bytes: these endpoints are read by programs, not people"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+def _envelope(request_id, result: bytes) -> bytes:
+    """JSON-RPC response around an already-serialized result, without building the outer dict"""
+    return b'{"jsonrpc":"2.0","id":' + _dumps(request_id) + b',"result":' + result + b'}'
+
+# Printable ASCII with nothing JSON would escape: such text can be spliced in verbatim
+_JSON_PLAIN = re.compile(r'[ !#-\[\]-~]*')
+
+def _content_bytes(text: str) -> bytes:
+    """Serialized tools/call result for text; HEX/RGB results skip the JSON encoder"""
+    if _JSON_PLAIN.fullmatch(text):
+        return b'{"content":[{"text":"' + text.encode('ascii') + b'"}]}'
+    return _dumps({"content": [{"text": text}]})
+
+# tools/list never changes, so it is built (and serialized) once
+_TOOLS_LIST_RESULT = {
+    "tools": [
+        {"name": "hex_to_rgb", "description": "Convert HEX color to RGB values"},
+        {"name": "rgb_to_hex", "description": "Convert RGB values to HEX color"},
+        {"name": "random_color", "description": "Generate a random color"},
+        {"name": "color_palette", "description": "Generate color palette"}
+    ]
+}
+_TOOLS_LIST_BYTES = _dumps(_TOOLS_LIST_RESULT)
+
+# tools/call name -> handler taking the call's arguments
+_TOOL_DISPATCH = {
+    'hex_to_rgb': lambda a: convert_hex_to_rgb(a.get('hex_color', '')),
+    'rgb_to_hex': lambda a: convert_rgb_to_hex(a.get('r', 0), a.get('g', 0), a.get('b', 0)),
+    'random_color': lambda a: generate_random_color(),
+    'color_palette': lambda a: generate_color_palette(a.get('base_color', 'FF0000'), a.get('palette_type', 'complementary')),
+}
+
+# Legacy direct JSON-RPC methods -> handler taking the request params
+_LEGACY_DISPATCH = {
+    'hex_to_rgb': lambda p: convert_hex_to_rgb(p.get('hex_color', '')),
+    'rgb_to_hex': lambda p: convert_rgb_to_hex(p.get('r', 0), p.get('g', 0), p.get('b', 0)),
+    'random_color': lambda p: generate_random_color(),
+}
+
+# Smallest response body worth gzipping
+_GZIP_MIN_SIZE = 512
+
+@functools.lru_cache(maxsize=64)
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding value allows gzip: listed (or covered by '*') with q > 0"""
+    wildcard = False
+    for item in accept_encoding.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding in ('gzip', 'x-gzip'):
+            # An explicit entry wins over '*'
+            return q > 0
+        if coding == '*':
+            wildcard = q > 0
+    return wildcard
+
+# Largest /mcp request body accepted
+_MAX_BODY = 1 << 20
+
+# Dashboard page, encoded once; only the {COUNT} marker changes between requests
+_DASHBOARD_TEMPLATE = b"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <title>Color MCP Server - Analysis Dashboard</title>
+            <style>
+                body { font-family: Arial, sans-serif; margin: 40px; }
+                .endpoint { background: #f5f5f5; padding: 10px; margin: 10px 0; border-radius: 5px; }
+                .log { background: #e8f4f8; padding: 5px; margin: 5px 0; font-family: monospace; }
+            </style>
+        </head>
+        <body>
+            <h1>Color MCP Server</h1>
+            <p><strong>Status:</strong> Running (Hybrid Mode)</p>
+            <p><strong>MCP Calls Logged:</strong> {COUNT}</p>
+            
+            <h2>HTTP Endpoints (for Wireshark analysis):</h2>
+            <div class="endpoint">
+                <strong>GET /api/hex-to-rgb?hex=FF0000</strong><br>
+                Convert HEX to RGB
+            </div>
+            <div class="endpoint">
+                <strong>GET /api/random-color</strong><br>
+                Generate random color
+            </div>
+            <div class="endpoint">
+                <strong>POST /mcp</strong><br>
+                JSON-RPC endpoint that simulates MCP protocol
+            </div>
+            
+            <h2><a href="/logs">View MCP Logs</a></h2>
+            
+            <h3>For Wireshark:</h3>
+            <p>1. Capture HTTP traffic<br>
+            2. Filter by: <code>http and tcp.port == 8080 </code><br>
+            3. Analyze POST requests to /mcp to see JSON-RPC messages</p>
+        </body>
+        </html>
+        """
 
 class AnalysisHandler(BaseHTTPRequestHandler):
+    # Keep-alive: clients reuse the TCP connection, so every response sets Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Socket read timeout (applied in setup) so idle or trickling clients can't pin a thread
+    timeout = 5.0
+    
     def do_GET(self):
         parsed_url = urlparse(self.path)
         path = parsed_url.path
@@ -168,58 +341,48 @@ class AnalysisHandler(BaseHTTPRequestHandler):
     
     def do_POST(self):
         if self.path == '/mcp':
-            content_length = int(self.headers['Content-Length'])
+            length = self.headers.get('Content-Length', '')
+            content_length = int(length) if length.isdigit() else 0
+            if content_length <= 0:
+                self.send_error(400, "Missing or invalid Content-Length")
+                return
+            if content_length > _MAX_BODY:
+                self.send_error(413)
+                return
             post_data = self.rfile.read(content_length)
             
+            # JSON-RPC batches aren't supported (dropped in MCP 2025-06-18): refuse before parsing the array
+            if post_data.lstrip(b' \t\r\n')[:1] == b'[':
+                self.send_json_response({
+                    "jsonrpc": "2.0",
+                    "id": None,
+                    "error": {"code": -32600, "message": "Batch requests are not supported"}
+                }, status=400)
+                return
+            
             try:
-                request_data = json.loads(post_data.decode('utf-8'))
+                # orjson parses the raw bytes directly, no decode step
+                request_data = orjson.loads(post_data) if orjson is not None else json.loads(post_data)
                 method = request_data.get('method')
                 params = request_data.get('params', {})
                 request_id = request_data.get('id', 1)
                 
                 # Manage standard MCP 
                 if method == 'tools/list':
-                    result = {
-                        "tools": [
-                            {"name": "hex_to_rgb", "description": "Convert HEX color to RGB values"},
-                            {"name": "rgb_to_hex", "description": "Convert RGB values to HEX color"},
-                            {"name": "random_color", "description": "Generate a random color"},
-                            {"name": "color_palette", "description": "Generate color palette"}
-                        ]
-                    }
+                    result = _TOOLS_LIST_BYTES
                     
                 elif method == 'tools/call':
                     tool_name = params.get('name')
-                    arguments = params.get('arguments', {})
-                    
-                    if tool_name == 'hex_to_rgb':
-                        result = {"content": [{"text": convert_hex_to_rgb(arguments.get('hex_color', ''))}]}
-                    elif tool_name == 'rgb_to_hex':
-                        result = {"content": [{"text": convert_rgb_to_hex(arguments.get('r', 0), arguments.get('g', 0), arguments.get('b', 0))}]}
-                    elif tool_name == 'random_color':
-                        result = {"content": [{"text": generate_random_color()}]}
-                    elif tool_name == 'color_palette':
-                        result = {"content": [{"text": generate_color_palette(arguments.get('base_color', 'FF0000'), arguments.get('palette_type', 'complementary'))}]}
-                    else:
-                        result = {"content": [{"text": f"Unknown tool: {tool_name}"}]}
+                    tool = _TOOL_DISPATCH.get(tool_name)
+                    text = tool(params.get('arguments', {})) if tool else f"Unknown tool: {tool_name}"
+                    result = _content_bytes(text)
                 
                 # direct calls (legacy)
-                elif method == 'hex_to_rgb':
-                    result = convert_hex_to_rgb(params.get('hex_color', ''))
-                elif method == 'rgb_to_hex':
-                    result = convert_rgb_to_hex(params.get('r', 0), params.get('g', 0), params.get('b', 0))
-                elif method == 'random_color':
-                    result = generate_random_color()
                 else:
-                    result = f"Unknown method: {method}"
-                
-                response = {
-                    "jsonrpc": "2.0",
-                    "id": request_id,
-                    "result": result
-                }
+                    legacy = _LEGACY_DISPATCH.get(method)
+                    result = _dumps(legacy(params) if legacy else f"Unknown method: {method}")
                 
-                self.send_json_response(response)
+                self.send_json_bytes(_envelope(request_id, result))
                 
             except Exception as e:
                 error_response = {
@@ -228,73 +391,59 @@ class AnalysisHandler(BaseHTTPRequestHandler):
                     "error": {"code": -1, "message": str(e)}
                 }
                 self.send_json_response(error_response)
+        else:
+            self.send_error(404)
+    
+    def _maybe_gzip(self, body):
+        """
+        Gzip body (fast level) when it's big enough to be worth it and the client accepts it
+        Returns: (body, extra header lines); any compressible body varies on Accept-Encoding
+        """
+        if len(body) < _GZIP_MIN_SIZE:
+            return body, b''
+        if _accepts_gzip(self.headers.get('Accept-Encoding', '')):
+            return gzip.compress(body, compresslevel=1), b'Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n'
+        return body, b'Vary: Accept-Encoding\r\n'
     
     def send_dashboard(self):
         """Send HTML dashboard"""
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Color MCP Server - Analysis Dashboard</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                .endpoint {{ background: #f5f5f5; padding: 10px; margin: 10px 0; border-radius: 5px; }}
-                .log {{ background: #e8f4f8; padding: 5px; margin: 5px 0; font-family: monospace; }}
-            </style>
-        </head>
-        <body>
-            <h1>Color MCP Server</h1>
-            <p><strong>Status:</strong> Running (Hybrid Mode)</p>
-            <p><strong>MCP Calls Logged:</strong> {len(mcp_log)}</p>
-            
-            <h2>HTTP Endpoints (for Wireshark analysis):</h2>
-            <div class="endpoint">
-                <strong>GET /api/hex-to-rgb?hex=FF0000</strong><br>
-                Convert HEX to RGB
-            </div>
-            <div class="endpoint">
-                <strong>GET /api/random-color</strong><br>
-                Generate random color
-            </div>
-            <div class="endpoint">
-                <strong>POST /mcp</strong><br>
-                JSON-RPC endpoint that simulates MCP protocol
-            </div>
-            
-            <h2><a href="/logs">View MCP Logs</a></h2>
-            
-            <h3>For Wireshark:</h3>
-            <p>1. Capture HTTP traffic<br>
-            2. Filter by: <code>http and tcp.port == 8080 </code><br>
-            3. Analyze POST requests to /mcp to see JSON-RPC messages</p>
-        </body>
-        </html>
-        """
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(html.encode())
+        self._send_bytes(200, b'text/html', _DASHBOARD_TEMPLATE.replace(b"{COUNT}", str(len(mcp_log)).encode()))
     
     def send_logs(self):
         """Send MCP logs"""
+        # Copy the tail in one C-level call first: handler threads keep appending (and evicting),
+        # which would break an iterator that runs Python code between steps
+        snapshot = list(islice(mcp_log, max(0, len(mcp_log) - 50), None))
         self.send_json_response({
             "mcp_calls": len(mcp_log),
-            "logs": mcp_log[-50:],  
+            "logs": [_with_timestamp(entry) for entry in snapshot],
             "info": "These logs show real MCP calls from your chatbot"
         })
     
-    def send_json_response(self, data):
+    def send_json_response(self, data, status=200):
         """Send JSON response"""
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, indent=2).encode())
+        self.send_json_bytes(_dumps(data), status)
+    
+    def send_json_bytes(self, body, status=200):
+        """Send an already-serialized JSON body"""
+        self._send_bytes(status, b'application/json', body, b'Access-Control-Allow-Origin: *\r\n')
+    
+    def _send_bytes(self, status, content_type, body, extra_headers=b''):
+        """Status line, headers and body assembled into one buffer and sent with a single write"""
+        body, encoding_headers = self._maybe_gzip(body)
+        self.log_request(status)
+        head = b'%s %d %s\r\nServer: %s\r\nDate: %s\r\nContent-Type: %s\r\n%sContent-Length: %d\r\n%s\r\n' % (
+            self.protocol_version.encode(), status, self.responses[status][0].encode(),
+            self.version_string().encode(), self.date_time_string().encode(), content_type,
+            encoding_headers, len(body), extra_headers
+        )
+        self.wfile.write(head + body)
 
 def run_http_server():
     """Run HTTP server in background thread"""
     port = int(os.environ.get('PORT', 8000))
-    server = HTTPServer(('0.0.0.0', port), AnalysisHandler)
+    # One thread per connection so a slow client doesn't stall every other request
+    server = ThreadingHTTPServer(('0.0.0.0', port), AnalysisHandler)
     print(f"HTTP Analysis Server running on http://0.0.0.0:{port}")
     print(f"Dashboard: http://localhost:{port}")
     print(f"Wireshark analysis ready!")
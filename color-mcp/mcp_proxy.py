@@ -1,8 +1,18 @@
+import os
 import requests
 import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from requests.adapters import HTTPAdapter
 
 REMOTE_SERVER = "https://mcp-color-server.onrender.com/mcp"
+_HEADERS = {'Content-Type': 'application/json'}
+
+# One pooled session: keep-alive reuses the TCP+TLS connection to the remote server
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_maxsize=32, max_retries=3))
+
+# Body logging is opt-in (MCP_DEBUG=1); bodies are forwarded as raw bytes either way
+_DEBUG = bool(os.environ.get('MCP_DEBUG'))
 
 class ProxyHandler(BaseHTTPRequestHandler):
     def do_POST(self):
@@ -11,26 +21,32 @@ class ProxyHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
             
-            print(f"Request from chatbot: {post_data.decode('utf-8')}")
+            if _DEBUG:
+                print(f"Request from chatbot: {post_data[:200]!r}")
             
             try:
                 # Forward to remote server
-                response = requests.post(REMOTE_SERVER, data=post_data, headers={'Content-Type': 'application/json'})
+                response = _session.post(REMOTE_SERVER, data=post_data, headers=_HEADERS, timeout=10)
                 
-                print(f"Response from remote: {response.text}")
+                body = response.content
+                if _DEBUG:
+                    print(f"Response from remote: {body[:200]!r}")
                 
                 # Get response from server
                 self.send_response(response.status_code)
                 self.send_header('Content-type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
                 self.end_headers()
-                self.wfile.write(response.content)
+                self.wfile.write(body)
                 
             except Exception as e:
                 error_response = {"jsonrpc": "2.0", "id": 1, "error": {"code": -1, "message": str(e)}}
+                body = json.dumps(error_response).encode()
                 self.send_response(500)
                 self.send_header('Content-type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
                 self.end_headers()
-                self.wfile.write(json.dumps(error_response).encode())
+                self.wfile.write(body)
 
 if __name__ == "__main__":
     server = HTTPServer(('localhost', 8080), ProxyHandler)
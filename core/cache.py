@@ -0,0 +1,70 @@
+import hashlib
+import re
+import sqlite3
+import time
+from typing import Dict, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase and collapse whitespace so trivially different prompts share a key"""
+    return _WHITESPACE.sub(" ", prompt).strip().lower()
+
+
+class ResponseCache:
+    """Exact-match cache of assistant replies: in-memory dict backed by SQLite with a TTL"""
+
+    def __init__(self, db_path: str = "response_cache.sqlite", ttl: float = 86400):
+        self.ttl = ttl
+        self._exact: Dict[str, Tuple[str, float]] = {}
+        self._db = sqlite3.connect(db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, reply TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+        self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, context: str = "") -> str:
+        """
+        Build the cache key for a prompt
+        Args:
+            model: Anthropic model name
+            prompt: User prompt (normalized before hashing)
+            context: Anything else that changes the reply (system prompt, tools, history)
+        Returns: sha256 hex digest
+        """
+        raw = f"{model}\0{context}\0{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for key, or None on a miss or expired entry"""
+        hit = self._exact.get(key)
+        if hit is None:
+            row = self._db.execute(
+                "SELECT reply, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            hit = self._exact[key] = (row[0], row[1])
+
+        reply, expires = hit
+        if expires < time.time():
+            self._exact.pop(key, None)
+            return None
+        return reply
+
+    def put(self, key: str, reply: str):
+        """Store a reply in memory and persist it"""
+        expires = time.time() + self.ttl
+        self._exact[key] = (reply, expires)
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, reply, expires) VALUES (?, ?, ?)",
+            (key, reply, expires)
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
@@ -1,34 +1,176 @@
 import os
+import asyncio
 import yaml
-import requests
+import httpx
 import json
-from typing import Dict, List, Any, Tuple
+import re
+import shlex
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from itertools import islice
+from datetime import datetime
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, List, Any, Optional, Tuple
 
 from clients.fastmcp import FastMCPClient
-from clients.stdio import StdioMCPClient
+from clients.stdio import StdioMCPClient, StdioMCPClientPool
 from clients.http import HTTPMCPClient
 #from clients.simple_api import SimpleAPIClient
 from utils.logger import mcp_logger
-from .config import ANTHROPIC_API_KEY
+from utils.helpers import ainput, json_dumpb, json_dumps, json_loads
+from .config import (
+    ANTHROPIC_API_KEY, RESPONSE_CACHE_FILE, RESPONSE_CACHE_TTL,
+    ANTHROPIC_MAX_RETRIES, ANTHROPIC_RETRY_BASE_DELAY, ANTHROPIC_MAX_RETRY_DELAY,
+    CONVERSATION_HISTORY_FILE, LEGACY_CONVERSATION_HISTORY_FILE,
+    MAX_CONVERSATION_HISTORY, MAX_STORED_HISTORY, HISTORY_TOKEN_BUDGET, MAX_TOOL_FAILURES, TOOL_FAILURE_WINDOW
+)
+from .cache import ResponseCache
 from colorama import Back, Fore, Style, init
 init()
 
+# libyaml-backed loader when PyYAML was built with it; same safe semantics
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+TOOL_RESULT_PREFIX = "Tool result:"
+QUIT_COMMANDS = frozenset(("/quit", "/exit", "/q"))
+# /tool <server> <tool> [{json} | key=value ...] calls a tool directly, skipping the model
+DIRECT_TOOL_PATTERN = re.compile(r"^/tool\s+(\S+)\s+(\S+)\s*(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def _compact_reply(reply: str) -> str:
+    """Replace tool output in an assistant reply with a short marker before it is replayed as history"""
+    idx = reply.find(TOOL_RESULT_PREFIX)
+    if idx == -1:
+        return reply
+    
+    count = reply.count(TOOL_RESULT_PREFIX, idx)
+    marker = f"[{count} tool result(s) omitted, {len(reply) - idx} chars]"
+    head = reply[:idx].rstrip()
+    return f"{head}\n\n{marker}" if head else marker
+
+
+def _print_chunk(chunk: str):
+    print(chunk, end="", flush=True)
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying a failed Messages request, or None if it shouldn't be retried"""
+    status = response.status_code
+    if status != 429 and status < 500:
+        return None
+    
+    # Rate limits and overload responses say when to come back
+    if status in (429, 503, 529):
+        try:
+            return min(float(response.headers["retry-after"]), ANTHROPIC_MAX_RETRY_DELAY)
+        except (KeyError, ValueError):
+            pass
+    return min(ANTHROPIC_RETRY_BASE_DELAY * 2 ** attempt, ANTHROPIC_MAX_RETRY_DELAY)
+
+
+def _parse_tool_args(raw: str) -> Dict[str, Any]:
+    """Arguments of a direct tool call: a JSON object, or key=value pairs (values parsed as JSON when they can be)"""
+    raw = raw.strip()
+    if not raw:
+        return {}
+    if raw[0] == "{":
+        return json_loads(raw)
+    
+    params = {}
+    for pair in shlex.split(raw):
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got '{pair}'")
+        try:
+            params[key] = json_loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+class AnthropicAPIError(Exception):
+    """Non-200 response from the Messages API"""
+    
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"API Error {status_code}: {text[:200]}")
+        self.status_code = status_code
+        self.text = text
+
+
 class ModularMCPChatbot:
     """Chatbot that manages multiple MCP servers"""
     
     def __init__(self, config_file: str = "servers.yaml"):
-        self.conversation_history: List[Tuple[str, str]] = []
+        self.conversation_history: Deque[Tuple[str, str]] = deque(maxlen=MAX_STORED_HISTORY)
+        # Full session, written on exit; conversation_history only keeps the recent turns
+        self._transcript: List[Tuple[str, str]] = []
         self.mcps: Dict[str, Dict[str, Any]] = {}
         self.config_file = config_file
+        self.response_cache = ResponseCache(RESPONSE_CACHE_FILE, RESPONSE_CACHE_TTL)
+        self._turn = 0
+        self._tool_failures: Dict[Tuple[str, str, str], List[int]] = {}
+        self._tools_payload: List[Dict[str, Any]] = []
+        # tool name -> (server, tool definition sent to Anthropic)
+        self._tool_index: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._tools_json = b""
+        self._system_message = ""
+        self._system_json = b""
+        # Bumped whenever self.mcps changes; the tools cache is rebuilt lazily when it falls behind
+        self._mcps_version = 0
+        self._tools_version = -1
+        self._warmup_task: Optional[asyncio.Task] = None
+        # (prefix, pattern, handler): inputs answered without an Anthropic round-trip
+        self._fast_paths: List[Tuple[str, "re.Pattern[str]", Callable[[re.Match], Any]]] = [
+            ("/tool", DIRECT_TOOL_PATTERN, self._run_direct_tool),
+        ]
+        # Keep-alive HTTP/2 client for Anthropic; auth and version headers are set once here
+        # The transport also retries failed connection attempts; HTTP status retries happen in _open_stream
+        self._http = httpx.AsyncClient(
+            base_url=ANTHROPIC_BASE_URL,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=ANTHROPIC_MAX_RETRIES,
+                limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+            ),
+            timeout=30,
+            headers={
+                "x-api-key": ANTHROPIC_API_KEY or "",
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json",
+            }
+        )
+    
+    async def _warm_anthropic(self):
+        """Open the pooled TLS connection to Anthropic so the first prompt skips the handshake"""
+        try:
+            await self._http.head("/")
+        except httpx.HTTPError:
+            pass
     
     async def load_mcps(self):
         """Load multiple MCPs from configuration"""
+        # Handshake with Anthropic while the MCP servers are starting up
+        self._warmup_task = asyncio.create_task(self._warm_anthropic())
         try:
-            with open(self.config_file, "r") as f:
-                config = yaml.safe_load(f)
+            # Whole file as bytes in one read; the loader detects the encoding itself
+            with open(self.config_file, "rb") as f:
+                config = yaml.load(f.read(), Loader=_YAML_LOADER)
             
-            for name, settings in config.items():
-                await self._load_single_mcp(name, settings)
+            # Connect to every server concurrently; failures are handled per server
+            results = await asyncio.gather(
+                *(self._load_single_mcp(name, settings) for name, settings in config.items()),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, tuple):
+                    name, entry = result
+                    self.mcps[name] = entry
+                    self._mcps_version += 1
             
             if not self.mcps:
                 print(f"{Fore.RED}No MCPs connected successfully{Style.RESET_ALL}")
@@ -41,8 +183,10 @@ class ModularMCPChatbot:
         except Exception as e:
             print(f"{Fore.RED} Error loading MCPs: {e}{Style.RESET_ALL}")
     
-    async def _load_single_mcp(self, name: str, settings: Dict[str, Any]):
+    async def _load_single_mcp(self, name: str, settings: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Connect one server; returns (name, entry) for self.mcps or None on failure"""
         server_type = settings.get("type", "stdio")
+        client = None
         
         try:
             if server_type == "fastmcp":
@@ -55,21 +199,28 @@ class ModularMCPChatbot:
                 client = await self._create_api_client(name, settings)
             else:
                 print(f"{Fore.RED} Unknown server type '{server_type}' for {name}{Style.RESET_ALL}")
-                return
+                return None
             
-            tools = await client.initialize()
+            tools = await client.ensure_initialized()
             anthropic_tools = client.get_anthropic_tools()
             
-            self.mcps[name] = {
+            print(f"{Fore.GREEN} Connected to {Fore.CYAN}{name}{Fore.GREEN} ({server_type}): {len(tools)} tools, {len(anthropic_tools)} anthropic tools{Style.RESET_ALL}")
+            
+            return name, {
                 "client": client,
                 "tools": tools,
                 "type": server_type
             }
             
-            print(f"{Fore.GREEN} Connected to {Fore.CYAN}{name}{Fore.GREEN} ({server_type}): {len(tools)} tools, {len(anthropic_tools)} anthropic tools{Style.RESET_ALL}")
-            
         except Exception as e:
             print(f"{Fore.RED} Failed to connect to {name}: {e}{Style.RESET_ALL}")
+            # The client is dropped here, so release whatever it started (processes, sessions, tasks)
+            if client is not None:
+                try:
+                    await client.close()
+                except Exception:
+                    pass
+            return None
 
     
     async def _create_fastmcp_client(self, name: str, settings: Dict[str, Any]):
@@ -84,7 +235,10 @@ class ModularMCPChatbot:
         cmd = settings["cmd"]
         cwd = settings.get("cwd", ".")
         config_module = settings.get("config_module")
+        pool_size = int(settings.get("pool_size", 1))
         
+        if pool_size > 1:
+            return StdioMCPClientPool(cmd, cwd, config_module, name, pool_size)
         return StdioMCPClient(cmd, cwd, config_module, name)
     
     async def _create_http_client(self, name: str, settings: Dict[str, Any]):
@@ -110,87 +264,224 @@ class ModularMCPChatbot:
         client_info = self.mcps[server]
         client = client_info["client"]
         
+        # Abort calls that keep failing with the same arguments instead of looping on them
+        failure_key = (server, tool, json.dumps(params, sort_keys=True, default=str))
+        recent = [t for t in self._tool_failures.get(failure_key, []) if self._turn - t < TOOL_FAILURE_WINDOW]
+        if len(recent) >= MAX_TOOL_FAILURES:
+            return f"Skipped {server}:{tool}: the same call failed {len(recent)} times in the last {TOOL_FAILURE_WINDOW} turns"
+        
         try:
             result = await client.call_tool(tool, **params)
             return result
         except Exception as e:
+            recent.append(self._turn)
+            self._tool_failures[failure_key] = recent
             return f"Error calling {server}:{tool}: {e}"
     
-    def get_anthropic_tools(self) -> List[Dict[str, Any]]:
-        tools = []
+    def _select_history(self, budget: int = HISTORY_TOKEN_BUDGET) -> List[Dict[str, str]]:
+        """Most recent history messages that fit in the token budget, oldest first"""
+        selected = []
+        used = 0
+        for role, content in islice(reversed(self.conversation_history), MAX_CONVERSATION_HISTORY):
+            used += _estimate_tokens(content)
+            if used > budget:
+                break
+            selected.append({"role": role, "content": content})
+        selected.reverse()
+        
+        # The replayed conversation must start with a user turn
+        while selected and selected[0]["role"] != "user":
+            selected.pop(0)
+        return selected
+    
+    def _rebuild_tools_cache(self):
+        """Precompute the tool index, the Anthropic tools payload built from it and the system prompt"""
+        index = {}
         
         for server, info in self.mcps.items():
             client = info["client"]
             if hasattr(client, 'get_anthropic_tools'):
-                server_tools = client.get_anthropic_tools()
-                for tool in server_tools:
-                    clean_tool = {
+                for tool in client.get_anthropic_tools():
+                    # Names are unique in the index (the API rejects duplicates); a later server wins
+                    index[tool["name"]] = (server, {
                         "name": tool["name"],
                         "description": tool["description"],
                         "input_schema": tool["input_schema"]
-                    }
-                    clean_tool["_server"] = server
-                    tools.append(clean_tool)
+                    })
+        
+        tools = [tool for _, tool in index.values()]
+        
+        # Breakpoint so the tool schemas are served from Anthropic's prompt cache
+        if tools:
+            tools[-1]["cache_control"] = {"type": "ephemeral"}
+        
+        self._tools_payload = tools
+        self._tool_index = index
+        self._tools_json = json_dumpb(tools) if tools else b""
+        
+        self._system_message = f"""You are a helpful assistant with access to various tools and services.
+
+Available services: {list(self.mcps.keys())}
+
+Be conversational and natural. Use the appropriate tools when users ask for specific functionality. Keep responses concise and short, please."""
+        # System prompt and tool schemas are a stable prefix: mark them for prompt caching
+        self._system_json = json_dumpb([{"type": "text", "text": self._system_message, "cache_control": {"type": "ephemeral"}}])
+        self._tools_version = self._mcps_version
+    
+    def _ensure_tools_cache(self):
+        """Rebuild the tools cache only if self.mcps changed since it was built"""
+        if self._tools_version != self._mcps_version:
+            self._rebuild_tools_cache()
+    
+    def get_anthropic_tools(self) -> List[Dict[str, Any]]:
+        self._ensure_tools_cache()
+        return self._tools_payload
+    
+    @asynccontextmanager
+    async def _open_stream(self, body: bytes) -> AsyncIterator[httpx.Response]:
+        """
+        POST a streaming Messages request, retrying 429/5xx replies with backoff
+        Yields: The open 200 response; anything else raises AnthropicAPIError once retries run out
+        """
+        request = self._http.build_request("POST", "/v1/messages", content=body)
+        for attempt in range(ANTHROPIC_MAX_RETRIES + 1):
+            response = await self._http.send(request, stream=True)
+            if response.status_code == 200:
+                break
+            
+            await response.aread()
+            await response.aclose()
+            delay = _retry_delay(response, attempt)
+            if delay is None or attempt == ANTHROPIC_MAX_RETRIES:
+                raise AnthropicAPIError(response.status_code, response.text)
+            await asyncio.sleep(delay)
+        
+        try:
+            yield response
+        finally:
+            await response.aclose()
+    
+    async def _stream_message(self, body: bytes, on_text: Optional[Callable[[str], None]],
+                              on_tool_use: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        POST a streaming Messages request and rebuild the content blocks from its SSE events
+        Args:
+            on_text: Called with each text delta as soon as it arrives
+            on_tool_use: Called with each tool_use block as soon as its input is complete
+        Returns: Dictionary shaped like a non-streamed response ({"content": [...]})
+        """
+        blocks: Dict[int, Dict[str, Any]] = {}
+        partial_json: Dict[int, List[str]] = {}
+        
+        async with self._open_stream(body) as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json_loads(line[5:])
+                event_type = event.get("type")
+                
+                if event_type == "content_block_start":
+                    blocks[event["index"]] = dict(event["content_block"])
+                elif event_type == "content_block_delta":
+                    delta = event["delta"]
+                    if delta["type"] == "text_delta":
+                        blocks[event["index"]]["text"] += delta["text"]
+                        if on_text:
+                            on_text(delta["text"])
+                    elif delta["type"] == "input_json_delta":
+                        partial_json.setdefault(event["index"], []).append(delta["partial_json"])
+                elif event_type == "content_block_stop":
+                    block = blocks[event["index"]]
+                    if block["type"] == "tool_use":
+                        raw = "".join(partial_json.pop(event["index"], []))
+                        block["input"] = json_loads(raw) if raw else {}
+                        if on_tool_use:
+                            on_tool_use(block)
+                elif event_type == "error":
+                    raise AnthropicAPIError(response.status_code, json_dumps(event.get("error")))
+        
+        return {"content": [blocks[i] for i in sorted(blocks)]}
+    
+    async def call_anthropic_with_tools(self, message: str, on_text: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Send a user message to Anthropic and run any requested tools
+        Args:
+            message: User input
+            on_text: Optional sink that receives the reply as it streams in
+                     (text deltas first, then tool results)
+        Returns: Full reply text
+        """
+        if on_text is None:
+            return await self._call_anthropic(message, None)
+        
+        streamed: List[str] = []
+        
+        def emit(chunk: str):
+            streamed.append(chunk)
+            on_text(chunk)
+        
+        reply = await self._call_anthropic(message, emit)
         
-        return tools
+        # Flush whatever was not streamed yet (tool results, errors, cached replies)
+        sent = "".join(streamed)
+        on_text(reply[len(sent):] if reply.startswith(sent) else f"\n{reply}")
+        return reply
     
-    async def call_anthropic_with_tools(self, message: str) -> str:
+    async def _call_anthropic(self, message: str, on_text: Optional[Callable[[str], None]]) -> str:
         if not ANTHROPIC_API_KEY:
             return "Please set ANTHROPIC_API_KEY in .env file"
         
         try:
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
-            
             #Use power saving settings
-            from .config import DEFAULT_MODEL, MAX_TOKENS, MAX_CONVERSATION_HISTORY, MAX_RESULT_LENGTH
+            from .config import DEFAULT_MODEL, MAX_TOKENS, MAX_RESULT_LENGTH
+            
+            self._turn += 1
             
-            messages = []
             # Limit history according to settings
-            for role, content in self.conversation_history[-MAX_CONVERSATION_HISTORY:]:
-                messages.append({"role": role, "content": content})
+            messages = self._select_history()
             messages.append({"role": "user", "content": message})
             
-            # get tools dynamically
-            tools = self.get_anthropic_tools()
-            
-            # Create mapping of tools to servers
-            tool_server_mapping = {}
-            clean_tools = []
-            
-            for tool in tools:
-                server = tool.pop('_server', None) 
-                tool_server_mapping[tool['name']] = server
-                clean_tools.append(tool)
-            
-            system_message = f"""You are a helpful assistant with access to various tools and services.
-
-Available services: {list(self.mcps.keys())}
-
-Be conversational and natural. Use the appropriate tools when users ask for specific functionality. Keep responses concise and short, please."""
+            # Tools, their servers and the system prompt are rebuilt only when the set of MCPs changes
+            self._ensure_tools_cache()
+            tool_index = self._tool_index
+            system_message = self._system_message
             
             payload = {
                 "model": DEFAULT_MODEL,  
                 "max_tokens": MAX_TOKENS,  
-                "system": system_message,
-                "messages": messages
+                "messages": messages,
+                "stream": True
             }
             
-            # Only add tools if they exist
-            if clean_tools:
-                payload["tools"] = clean_tools
-                payload["tool_choice"] = {"type": "auto"}
+            # Identical prompt in the same context -> reuse the previous reply
+            cache_context = json_dumps([system_message, sorted(tool_index), messages[:-1]])
+            cache_key = self.response_cache.make_key(DEFAULT_MODEL, message, cache_context)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Splice in the pre-serialized system prompt and tools instead of re-encoding them every turn
+            body = json_dumpb(payload)[:-1] + b',"system":' + self._system_json
+            if self._tools_json:
+                body += b',"tools":' + self._tools_json + b',"tool_choice":{"type":"auto"}'
+            body += b'}'
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            # Each tool call starts as soon as its tool_use block is complete, while the rest of the reply streams
+            tool_tasks: Dict[str, asyncio.Task] = {}
             
-            if response.status_code != 200:
-                return f"API Error {response.status_code}: {response.text[:200]}"
+            def start_tool(block: Dict[str, Any]):
+                entry = tool_index.get(block["name"])
+                if entry:
+                    tool_tasks[block["id"]] = asyncio.create_task(
+                        self.call_mcp_tool(entry[0], block["name"], block["input"])
+                    )
             
-            result = response.json()
+            try:
+                result = await self._stream_message(body, on_text, start_tool)
+            except BaseException:
+                for task in tool_tasks.values():
+                    task.cancel()
+                raise
             
             # Process response
             response_text = ""
@@ -199,24 +490,37 @@ Be conversational and natural. Use the appropriate tools when users ask for spec
             if "content" not in result:
                 return f"Unexpected response format: {result}"
             
+            tool_uses = []
             for content in result["content"]:
                 if content["type"] == "text":
                     response_text += content["text"]
                 elif content["type"] == "tool_use":
-                    tool_name = content["name"]
-                    tool_input = content["input"]
-                    
-                    # Find the correct server using mapping
-                    server = tool_server_mapping.get(tool_name)
-                    
-                    if server:
-                        tool_result = await self.call_mcp_tool(server, tool_name, tool_input)
-                        # Truncate tool result to save tokens
-                        if len(tool_result) > MAX_RESULT_LENGTH:
-                            tool_result = tool_result[:MAX_RESULT_LENGTH] + "..."
-                        tool_results.append(f"Tool result: {tool_result}")
-                    else:
-                        tool_results.append(f"Tool {tool_name} not found in any server")
+                    tool_uses.append(content)
+            
+            # Collect the calls started mid-stream (any block that never saw its stop event starts now), in order
+            coros = [
+                tool_tasks.get(c["id"]) or self.call_mcp_tool(tool_index[c["name"]][0], c["name"], c["input"])
+                for c in tool_uses if c["name"] in tool_index
+            ]
+            results = iter(await asyncio.gather(*coros, return_exceptions=True))
+            
+            for content in tool_uses:
+                tool_name = content["name"]
+                if tool_name not in tool_index:
+                    tool_results.append(f"Tool {tool_name} not found in any server")
+                    continue
+                
+                tool_result = next(results)
+                if isinstance(tool_result, Exception):
+                    tool_result = f"Error calling {tool_name}: {tool_result}"
+                # Truncate tool result to save tokens
+                if len(tool_result) > MAX_RESULT_LENGTH:
+                    tool_result = tool_result[:MAX_RESULT_LENGTH] + "..."
+                tool_results.append(f"Tool result: {tool_result}")
+            
+            # Tool results depend on live server state, so only pure text replies are cached
+            if not tool_uses and response_text:
+                self.response_cache.put(cache_key, response_text)
             
             if tool_results:
                 if response_text:
@@ -225,13 +529,39 @@ Be conversational and natural. Use the appropriate tools when users ask for spec
             
             return response_text if response_text else "I couldn't process that request."
             
-        except requests.exceptions.RequestException as e:
+        except AnthropicAPIError as e:
+            return str(e)
+        except httpx.HTTPError as e:
             return f"Network error: {e}"
         except json.JSONDecodeError as e:
             return f"JSON decode error: {e}"
         except Exception as e:
             return f"Error calling Anthropic: {e}"
     
+    async def _run_direct_tool(self, match: re.Match):
+        """Handle /tool <server> <tool> [args] by calling the MCP tool directly"""
+        server, tool, raw_args = match.groups()
+        try:
+            params = _parse_tool_args(raw_args)
+        except ValueError as e:
+            print(f"{Fore.RED}Invalid tool arguments: {e}{Style.RESET_ALL}\n")
+            return
+        
+        result = await self.call_mcp_tool(server, tool, params)
+        print(f"{Fore.CYAN} {server}:{tool} ->{Style.RESET_ALL} {Fore.WHITE}{result}{Style.RESET_ALL}\n")
+    
+    async def _try_fast_path(self, user_input: str) -> bool:
+        """Run the first fast path matching the input; False if none applies"""
+        for prefix, pattern, handler in self._fast_paths:
+            # Cheap prefix check first so ordinary prompts never hit the regex
+            if user_input[:len(prefix)].lower() != prefix:
+                continue
+            match = pattern.match(user_input)
+            if match:
+                await handler(match)
+                return True
+        return False
+    
     async def chat(self):
         """Main chat loop"""
         print(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'='*50}{Style.RESET_ALL}")
@@ -241,34 +571,48 @@ Be conversational and natural. Use the appropriate tools when users ask for spec
         await self.load_mcps()
         
         print(f"{Fore.YELLOW}💬 Chat with me! The assistant will use appropriate tools automatically.{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}📋 Commands: '/quit' to exit, '/log' for MCP interactions, '/history' for conversation, '/servers' for server info{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}📋 Commands: '/quit' to exit, '/log' for MCP interactions, '/history' for conversation, '/sessions' for saved sessions, '/servers' for server info, '/tool <server> <tool> [args]' to call a tool directly{Style.RESET_ALL}")
         print()
         
+        commands = {
+            "/log": mcp_logger.print_interaction_log,
+            "/history": self._print_conversation_history,
+            "/sessions": self._print_saved_sessions,
+            "/servers": self._print_servers_summary,
+        }
+        
         try:
             while True:
-                user_input = input(f"{Fore.GREEN}> {Style.RESET_ALL}").strip()
+                # Read stdin off the event loop so background tasks keep running while the user types
+                user_input = (await ainput(f"{Fore.GREEN}> {Style.RESET_ALL}")).strip()
                 
                 if not user_input:
                     continue
                 
-                if user_input.lower() in ["/quit", "/exit", "/q"]:
-                    print(f"{Fore.YELLOW}👋 Goodbye!{Style.RESET_ALL}")
-                    break
-                elif user_input.lower() == "/log":
-                    mcp_logger.print_interaction_log()
-                    continue
-                elif user_input.lower() == "/servers":
-                    self._print_servers_summary()
-                    continue
+                # Slash commands: one lowercase + one lookup instead of an if/elif chain
+                if user_input[0] == "/":
+                    command = user_input.lower()
+                    if command in QUIT_COMMANDS:
+                        print(f"{Fore.YELLOW}👋 Goodbye!{Style.RESET_ALL}")
+                        break
+                    handler = commands.get(command)
+                    if handler:
+                        handler()
+                        continue
+                    if await self._try_fast_path(user_input):
+                        continue
                 
                 print(f"{Fore.MAGENTA} Assitant is thinking...{Style.RESET_ALL}")
-                response = await self.call_anthropic_with_tools(user_input)
-                print(f"{Fore.CYAN} Assistant said:{Style.RESET_ALL} {Fore.WHITE}{response}{Style.RESET_ALL}\n")
+                print(f"{Fore.CYAN} Assistant said:{Style.RESET_ALL} {Fore.WHITE}", end="", flush=True)
+                response = await self.call_anthropic_with_tools(user_input, on_text=_print_chunk)
+                print(f"{Style.RESET_ALL}\n")
                 
-                self.conversation_history.append(("user", user_input))
-                self.conversation_history.append(("assistant", response))
+                turn = (("user", user_input), ("assistant", _compact_reply(response)))
+                self.conversation_history.extend(turn)
+                self._transcript.extend(turn)
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl+C into a cancellation of the main task
             print(f"\n{Fore.YELLOW}👋 Goodbye!{Style.RESET_ALL}")
         
         finally:
@@ -276,51 +620,100 @@ Be conversational and natural. Use the appropriate tools when users ask for spec
     
     async def cleanup(self):
         # Auto-save conversation if it has messages
-        if self.conversation_history:
+        if self._transcript:
             self._auto_save_conversation()
         
-        # Close MCP Connections
-        for info in self.mcps.items():
-            try:
-                await info["client"].close()
-            except:
-                pass
+        # Close MCP connections concurrently; a failing close is logged, not fatal
+        results = await asyncio.gather(
+            *(info["client"].close() for info in self.mcps.values()),
+            return_exceptions=True
+        )
+        for (name, info), result in zip(self.mcps.items(), results):
+            if isinstance(result, BaseException):
+                mcp_logger.log_server_connection(name, info["type"], "close failed", error=result)
+        
+        if self._warmup_task is not None and not self._warmup_task.done():
+            self._warmup_task.cancel()
+        await self._http.aclose()
+        self.response_cache.close()
     
     def _auto_save_conversation(self):
         try:
-            import json
-            from datetime import datetime
-            import os
-            
-            filename = "conversation_history.json"
-            
-            # Read file if it exists
-            if os.path.exists(filename):
-                try:
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                except (json.JSONDecodeError, KeyError):
-                    data = {"sessions": []}
-            else:
-                data = {"sessions": []}
-            
             # Add new session only if there are messages
-            if self.conversation_history:
+            if self._transcript:
                 session = {
                     "timestamp": datetime.now().isoformat(),
-                    "messages": self.conversation_history
+                    "messages": self._transcript
                 }
-                data["sessions"].append(session)
                 
-                # Save updated file
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                # One session per line: saving appends instead of rewriting every previous session
+                with open(CONVERSATION_HISTORY_FILE, 'ab+') as f:
+                    record = json_dumpb(session) + b"\n"
+                    # A crash mid-write leaves a truncated last line; start on a fresh one so
+                    # this session isn't glued onto it and dropped by _load_sessions
+                    if f.seek(0, os.SEEK_END) > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b"\n":
+                            record = b"\n" + record
+                    f.write(record)
                 
-                print(f"Conversation saved to {filename}")
+                print(f"Conversation saved to {CONVERSATION_HISTORY_FILE}")
             
         except Exception as e:
             print(f"Failed to save conversation: {e}")
     
+    @staticmethod
+    def _load_sessions() -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield saved sessions, oldest first
+        Sessions from the old single-document conversation_history.json come before the JSONL ones
+        """
+        if os.path.exists(LEGACY_CONVERSATION_HISTORY_FILE):
+            try:
+                with open(LEGACY_CONVERSATION_HISTORY_FILE, 'rb') as f:
+                    sessions = json_loads(f.read()).get("sessions", [])
+            except (ValueError, AttributeError):
+                sessions = []
+            yield from sessions
+        
+        if os.path.exists(CONVERSATION_HISTORY_FILE):
+            with open(CONVERSATION_HISTORY_FILE, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    # A line cut short by a crash mid-append is skipped, not fatal
+                    try:
+                        yield json_loads(line)
+                    except ValueError:
+                        continue
+    
+    def _print_saved_sessions(self, limit: int = 5):
+        """Show the most recent saved sessions, reading the history files lazily"""
+        print(f"\n{Fore.MAGENTA}{'='*60}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}{Style.BRIGHT}SAVED SESSIONS{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{'='*60}{Style.RESET_ALL}")
+        
+        # Only the last `limit` sessions are ever held in memory
+        total = 0
+        recent: Deque[Dict[str, Any]] = deque(maxlen=limit)
+        for session in self._load_sessions():
+            total += 1
+            recent.append(session)
+        
+        if not total:
+            print(f"{Fore.YELLOW}No saved sessions yet.{Style.RESET_ALL}")
+            return
+        
+        for i, session in enumerate(recent, total - len(recent) + 1):
+            messages = session.get("messages", [])
+            first = next((content for role, content in messages if role == "user"), "")
+            preview = f"{first[:80]}..." if len(first) > 80 else first
+            print(f"\n{Fore.WHITE}[{i}] {Fore.YELLOW}{session.get('timestamp', '?')}{Fore.WHITE} - {len(messages)} messages{Style.RESET_ALL}")
+            print(f"{Fore.WHITE}{preview}{Style.RESET_ALL}")
+        
+        print(f"\n{Fore.CYAN}Total saved sessions: {total}{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{'='*60}{Style.RESET_ALL}")
+    
     def _print_conversation_history(self):
         print(f"\n{Fore.MAGENTA}{'='*60}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}{Style.BRIGHT}CONVERSATION HISTORY{Style.RESET_ALL}")
@@ -343,17 +736,17 @@ Be conversational and natural. Use the appropriate tools when users ask for spec
                 print(f"{Fore.WHITE}{content}{Style.RESET_ALL}")
         
         print(f"\n{Fore.CYAN}Total messages: {len(self.conversation_history)}{Style.RESET_ALL}")
-        user_count = len([h for h in self.conversation_history if h[0] == "user"])
-        assistant_count = len([h for h in self.conversation_history if h[0] == "assistant"])
-        print(f"{Fore.GREEN}User messages: {user_count}{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}Assistant messages: {assistant_count}{Style.RESET_ALL}")
+        role_counts = Counter(role for role, _ in self.conversation_history)
+        print(f"{Fore.GREEN}User messages: {role_counts['user']}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Assistant messages: {role_counts['assistant']}{Style.RESET_ALL}")
         print(f"{Fore.MAGENTA}{'='*60}{Style.RESET_ALL}")
     
     def get_conversation_history(self) -> List[Tuple[str, str]]:
-        return self.conversation_history.copy()
+        return list(self.conversation_history)
     
     def clear_conversation_history(self):
         self.conversation_history.clear()
+        self._transcript.clear()
     
     def get_server_status(self) -> Dict[str, Any]:
         status = {}
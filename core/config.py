@@ -15,12 +15,31 @@ DEFAULT_LOG_FILE = "mcp_interactions.log"
 DEFAULT_MODEL = "claude-3-5-haiku-20241022"
 MAX_TOKENS = 250
 MAX_CONVERSATION_HISTORY = 8
+MAX_STORED_HISTORY = 20  # Mensajes recientes en memoria; la sesión completa se guarda al salir
+HISTORY_TOKEN_BUDGET = 2000  # Tokens aproximados de historial reenviados por turno
+
+# Detección de bucles de herramientas
+MAX_TOOL_FAILURES = 2      # Fallos repetidos de la misma llamada antes de abortarla
+TOOL_FAILURE_WINDOW = 3    # Turnos en los que se cuentan esos fallos
+
+# Caché de respuestas
+RESPONSE_CACHE_FILE = "response_cache.sqlite"
+RESPONSE_CACHE_TTL = 24 * 60 * 60  # Segundos
+
+# Historial de conversaciones (una sesión por línea, JSON Lines)
+CONVERSATION_HISTORY_FILE = "conversation_history.jsonl"
+LEGACY_CONVERSATION_HISTORY_FILE = "conversation_history.json"
 
 # Timeouts 
 TOOL_CALL_TIMEOUT = 30
 SERVER_RESPONSE_TIMEOUT = 10
 HTTP_REQUEST_TIMEOUT = 30
 
+# Reintentos hacia Anthropic (429/5xx) con espera exponencial
+ANTHROPIC_MAX_RETRIES = 3
+ANTHROPIC_RETRY_BASE_DELAY = 0.5  # Segundos; se duplica en cada intento
+ANTHROPIC_MAX_RETRY_DELAY = 30    # Tope para retry-after y la espera exponencial
+
 # Configuraciones de logging
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_LEVEL = "INFO"
@@ -21,12 +21,21 @@ let allDiets = [];
 let foods = [];
 let recetas = [];
 let substitutions = {};
+// Diet_type (minúsculas) -> recetas de All_Diets, construido una vez al cargar los datos
+let dietIndex = new Map();
 
 // Cargar los datos JSON
 function loadFoods() {
   if (fs.existsSync(allDietsPath)) {
     try {
       allDiets = JSON.parse(fs.readFileSync(allDietsPath, 'utf-8'));
+      dietIndex = new Map();
+      for (const r of allDiets) {
+        if (!r.Diet_type) continue;
+        const key = r.Diet_type.toLowerCase();
+        if (!dietIndex.has(key)) dietIndex.set(key, []);
+        dietIndex.get(key).push(r);
+      }
     } catch (e) {
       console.error('Error loading All_Diets.json:', e);
     }
@@ -310,7 +319,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
             content: [{ type: 'text', text: 'No se reconoce el tipo de dieta solicitado.' }],
           };
         }
-        let filtered = allDiets.filter(r => r.Diet_type && r.Diet_type.toLowerCase() === mappedDiet);
+        let filtered = dietIndex.get(mappedDiet) || [];
         if (toolArgs.maxCalories) {
           filtered = filtered.filter(r => parseFloat(r['Carbs(g)'] || 0) + parseFloat(r['Fat(g)'] || 0) + parseFloat(r['Protein(g)'] || 0) <= toolArgs.maxCalories);
         }
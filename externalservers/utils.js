@@ -8,6 +8,24 @@
  */
 function getFoodOrRecipeByMoodAndSeason(items, mood, season) {
   if (!Array.isArray(items) || !mood) return [];
+  // Los datos no cambian tras cargarse: cada (mood, season) se calcula una sola vez por lista
+  let cache = MOOD_SEASON_CACHE.get(items);
+  if (!cache) {
+    cache = new Map();
+    MOOD_SEASON_CACHE.set(items, cache);
+  }
+  const cacheKey = `${mood.toLowerCase()}|${season ? season.toLowerCase() : ''}`;
+  let result = cache.get(cacheKey);
+  if (!result) {
+    result = scanByMoodAndSeason(items, mood, season);
+    cache.set(cacheKey, result);
+  }
+  return result;
+}
+// items -> Map("mood|season" -> recomendaciones)
+const MOOD_SEASON_CACHE = new WeakMap();
+
+function scanByMoodAndSeason(items, mood, season) {
   const moodKey = mood.toLowerCase();
   const moodData = MOOD_SEASON_FOOD_MAP.moods[moodKey];
   let foodTypes = [];
@@ -20,4 +20,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # asyncio.run re-raises Ctrl+C once main() has finished cleaning up
+        pass
\ No newline at end of file
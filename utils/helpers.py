@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize to a JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def json_dumpb(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes without an intermediate str when orjson is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Bytes read past the last newline, kept for the next ainput() call
+_stdin_pending = bytearray()
+
+
+async def ainput(prompt: str = "") -> str:
+    """
+    input() that doesn't block the event loop
+    On POSIX stdin is watched with loop.add_reader, so no thread is ever left blocked in
+    input() when the loop shuts down; elsewhere it falls back to a daemon reader thread
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, ValueError, OSError):
+        fd = None
+    if fd is None or sys.platform == "win32":
+        return await _ainput_thread(loop, prompt)
+
+    print(prompt, end="", flush=True)
+    while b"\n" not in _stdin_pending:
+        await _readable(loop, fd)
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            if not _stdin_pending:
+                raise EOFError
+            break
+        _stdin_pending.extend(chunk)
+
+    line, _, rest = bytes(_stdin_pending).partition(b"\n")
+    _stdin_pending[:] = rest
+    return line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r")
+
+
+async def _readable(loop: asyncio.AbstractEventLoop, fd: int) -> None:
+    """Wait until fd has data; returns at once for regular files, which can't be polled"""
+    ready = loop.create_future()
+    try:
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+    except (OSError, NotImplementedError):
+        return
+    try:
+        await ready
+    finally:
+        loop.remove_reader(fd)
+
+
+async def _ainput_thread(loop: asyncio.AbstractEventLoop, prompt: str) -> str:
+    """Fallback for event loops without add_reader support for stdin"""
+    future = loop.create_future()
+
+    def _resolve(setter, value):
+        if not future.done():
+            setter(value)
+
+    def _read():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_resolve, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(_resolve, future.set_result, line)
+
+    threading.Thread(target=_read, daemon=True).start()
+    return await future
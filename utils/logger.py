@@ -81,6 +81,10 @@ class MCPLogger:
         else:
             self.logger.error(f"{log_msg}: {error}")
     
+    def log_server_stderr(self, server: str, line: str):
+        """Registrar una línea de stderr de un servidor MCP (solo en el archivo de log)"""
+        self.logger.warning(f"[{server}] stderr: {line}")
+    
     def get_session_summary(self) -> Dict[str, Any]:
         """Obtener resumen de la sesión actual"""
         total_interactions = len(self.interaction_log)